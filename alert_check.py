@@ -5,7 +5,7 @@ Run this from OpenClaw cron to get notified of funding opportunities.
 """
 import asyncio
 import sys
-from monitor import fetch_all_funding, find_opportunities
+from monitor import fetch_all_funding, find_opportunities, top_opportunities, stale_tag
 
 async def main():
     try:
@@ -13,14 +13,14 @@ async def main():
         opportunities = find_opportunities(rates)
         
         if opportunities:
-            # Output alert for cron to pick up
-            print(f"🚨 **FUNDING ARB ALERT** - {len(opportunities)} opportunities!")
-            print()
-            for opp in opportunities[:5]:
-                print(f"• **{opp['base']}** @ {opp['exchange']}")
-                print(f"  Funding: {opp['annualized']:.1f}% → Net: {opp['net_yield_apr']:.1f}% APR")
-            print()
-            print("Run `cd ~/dev/funding-arb && python3 main.py scan` for details")
+            # Output alert for cron to pick up (single write)
+            lines = [f"🚨 **FUNDING ARB ALERT** - {len(opportunities)} opportunities!", ""]
+            for opp in top_opportunities(opportunities):
+                lines.append(f"• **{opp['base']}** @ {opp['exchange']}{stale_tag(opp)}")
+                lines.append(f"  Funding: {opp['annualized']:.1f}% → Net: {opp['net_yield_apr']:.1f}% APR")
+            lines.append("")
+            lines.append("Run `cd ~/dev/funding-arb && python3 main.py scan` for details")
+            print("\n".join(lines))
             sys.exit(0)  # Alert found
         else:
             # No alert needed
@@ -5,16 +5,27 @@ Downloads historical funding data and simulates strategy performance.
 """
 import asyncio
 import aiohttp
-import json
+import orjson
+import sys
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from dataclasses import dataclass
-import pandas as pd
+import numpy as np
 
 DATA_DIR = Path("data/backtest")
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-@dataclass
+FUNDING_HISTORY_URL = "https://fapi.binance.com/fapi/v1/fundingRate"
+PAGE_LIMIT = 1000  # Max records per fundingRate request
+FUNDING_INTERVAL_MS = 8 * 60 * 60 * 1000
+
+# Cached/analyzed funding history: one typed record per funding event
+FUNDING_DTYPE = np.dtype([("fundingTime", np.int64), ("fundingRate", np.float64)])
+
+# Concurrent requests to Binance (keeps symbol/page fan-out under the weight limit)
+BINANCE_SEMAPHORE = asyncio.Semaphore(4)
+
+@dataclass(slots=True)
 class BacktestConfig:
     # Entry threshold (funding rate per 8h)
     entry_threshold: float = -0.0015  # -0.15%
@@ -30,163 +41,245 @@ class BacktestConfig:
     position_size: float = 1000  # $1000 per position
     max_positions: int = 3
 
-async def fetch_binance_funding_history(symbol: str, days: int = 30) -> list[dict]:
-    """Fetch historical funding rates from Binance"""
-    url = "https://fapi.binance.com/fapi/v1/fundingRate"
-    
-    async with aiohttp.ClientSession() as session:
-        all_data = []
-        end_time = int(datetime.now(timezone.utc).timestamp() * 1000)
-        start_time = end_time - (days * 24 * 60 * 60 * 1000)
-        
-        while True:
-            params = {
-                "symbol": symbol,
-                "startTime": start_time,
-                "endTime": end_time,
-                "limit": 1000
-            }
-            async with session.get(url, params=params) as resp:
-                data = await resp.json()
-                if not data:
-                    break
-                all_data.extend(data)
-                if len(data) < 1000:
-                    break
-                end_time = data[0]["fundingTime"] - 1
-        
-        return sorted(all_data, key=lambda x: x["fundingTime"])
-
-def run_backtest(funding_data: list[dict], config: BacktestConfig) -> dict:
+def to_funding_array(data: list[dict]) -> np.ndarray:
+    """Convert raw fundingRate records to a FUNDING_DTYPE array"""
+    funding = np.empty(len(data), dtype=FUNDING_DTYPE)
+    funding["fundingTime"] = np.fromiter((d["fundingTime"] for d in data), dtype=np.int64, count=len(data))
+    funding["fundingRate"] = np.fromiter((float(d["fundingRate"]) for d in data), dtype=np.float64, count=len(data))
+    return funding
+
+async def fetch_funding_window(session: aiohttp.ClientSession, symbol: str,
+                               start_time: int, end_time: int) -> np.ndarray:
+    """Fetch one [start_time, end_time] window, paging forward if it holds more than a page"""
+    pages = []
+    while start_time <= end_time:
+        params = {
+            "symbol": symbol,
+            "startTime": start_time,
+            "endTime": end_time,
+            "limit": PAGE_LIMIT
+        }
+        async with BINANCE_SEMAPHORE, session.get(FUNDING_HISTORY_URL, params=params) as resp:
+            resp.raise_for_status()
+            data = orjson.loads(await resp.read())
+        # Keep only the two typed fields; the page's dicts are dropped right away
+        page = to_funding_array(data)
+        pages.append(page)
+        if len(page) < PAGE_LIMIT:
+            break
+        start_time = int(page["fundingTime"][-1]) + 1
+    return np.concatenate(pages) if pages else np.empty(0, dtype=FUNDING_DTYPE)
+
+async def fetch_binance_funding_history(session: aiohttp.ClientSession, symbol: str,
+                                        days: int = 30) -> np.ndarray:
+    """Fetch historical funding rates from Binance as a sorted FUNDING_DTYPE array"""
+    end_time = int(datetime.now(timezone.utc).timestamp() * 1000)
+    start_time = end_time - (days * 24 * 60 * 60 * 1000)
+    
+    # Binance returns the first `limit` records from startTime, so split the range
+    # into page-sized windows up front and fetch them concurrently
+    window_ms = PAGE_LIMIT * FUNDING_INTERVAL_MS
+    windows = [(t, min(t + window_ms - 1, end_time)) for t in range(start_time, end_time + 1, window_ms)]
+    pages = await asyncio.gather(*(fetch_funding_window(session, symbol, s, e) for s, e in windows))
+    
+    # Sort by time and drop any record seen in two windows
+    funding = np.concatenate(pages)
+    _, first = np.unique(funding["fundingTime"], return_index=True)
+    return funding[first]
+
+def new_session() -> aiohttp.ClientSession:
+    """Session shared by all history requests in a run (pooled, DNS cached)"""
+    return aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=20, ttl_dns_cache=300))
+
+def pair_trades(entry_candidates: np.ndarray,
+                exit_candidates: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Pair sorted entry/exit candidate periods into trades.
+    
+    Enter on the first entry candidate while flat, exit on the first exit
+    candidate strictly after it. Returns (entries, exits); entries has one
+    extra element if a position is still open at the end.
+    """
+    entries, exits = [], []
+    flat_from = 0
+    while True:
+        i = np.searchsorted(entry_candidates, flat_from)
+        if i == len(entry_candidates):
+            break
+        entry = entry_candidates[i]
+        entries.append(entry)
+
+        j = np.searchsorted(exit_candidates, entry, side="right")
+        if j == len(exit_candidates):
+            break
+        exits.append(exit_candidates[j])
+        flat_from = exit_candidates[j] + 1
+
+    return np.array(entries, dtype=np.intp), np.array(exits, dtype=np.intp)
+
+def find_trade_indices(rates: np.ndarray, entry_threshold: float,
+                       exit_threshold: float) -> tuple[np.ndarray, np.ndarray]:
     """
-    Run backtest simulation.
+    Locate trade entry/exit periods without a per-period loop.
+
+    Enter on the first period with rate < entry_threshold while flat, exit on
+    the first later period with rate > exit_threshold. See pair_trades().
+    """
+    # Most periods are neither; only the candidate indices are ever visited
+    return pair_trades(np.flatnonzero(rates < entry_threshold), np.flatnonzero(rates > exit_threshold))
+
+def run_backtest(funding: np.ndarray, config: BacktestConfig, symbol: str = "unknown") -> dict:
+    """
+    Run backtest simulation over a FUNDING_DTYPE array.
     
     Returns performance metrics.
     """
-    if not funding_data:
+    if not len(funding):
         return {"error": "No data"}
     
-    # Convert to DataFrame
-    df = pd.DataFrame(funding_data)
-    df["fundingRate"] = df["fundingRate"].astype(float)
-    df["timestamp"] = pd.to_datetime(df["fundingTime"], unit="ms")
-    df = df.sort_values("timestamp").reset_index(drop=True)
-    
-    # Simulation state
-    position_open = False
-    entry_rate = 0
-    entry_idx = 0
-    trades = []
-    total_pnl = 0
-    total_funding = 0
-    total_costs = 0
-    
-    for i, row in df.iterrows():
-        rate = row["fundingRate"]
-        
-        if not position_open:
-            # Check entry
-            if rate < config.entry_threshold:
-                position_open = True
-                entry_rate = rate
-                entry_idx = i
-                total_costs += (config.entry_cost + config.slippage) * config.position_size
-        else:
-            # Collect funding
-            funding_received = -rate * config.position_size
-            total_funding += funding_received
-            total_costs += config.borrow_rate_8h * config.position_size
-            
-            # Check exit
-            if rate > config.exit_threshold:
-                position_open = False
-                total_costs += config.exit_cost * config.position_size
-                
-                periods = i - entry_idx
-                trade_funding = sum(-df.iloc[j]["fundingRate"] * config.position_size 
-                                   for j in range(entry_idx, i+1))
-                trade_costs = ((config.entry_cost + config.exit_cost + config.slippage) * config.position_size +
-                              config.borrow_rate_8h * config.position_size * periods)
-                trade_pnl = trade_funding - trade_costs
-                
-                trades.append({
-                    "entry_time": df.iloc[entry_idx]["timestamp"],
-                    "exit_time": row["timestamp"],
-                    "periods": periods,
-                    "avg_funding": entry_rate,
-                    "funding_collected": trade_funding,
-                    "costs": trade_costs,
-                    "pnl": trade_pnl,
-                    "pnl_pct": trade_pnl / config.position_size * 100,
-                })
-                total_pnl += trade_pnl
+    # Read config once up front rather than per use
+    entry_thresh = config.entry_threshold
+    exit_thresh = config.exit_threshold
+    pos_size = config.position_size
+    fixed_cost = (config.entry_cost + config.exit_cost + config.slippage) * pos_size
+    borrow_per_period = config.borrow_rate_8h * pos_size
+    
+    # Fetched/cached history is already sorted; only reorder if a caller's isn't
+    times = funding["fundingTime"]
+    if np.any(times[1:] < times[:-1]):
+        funding = funding[np.argsort(times, kind="stable")]
+        times = funding["fundingTime"]
     
+    rates = funding["fundingRate"]
+    flows = -rates * pos_size  # Funding received per period while long
+
+    entry_idx, exit_idx = find_trade_indices(rates, entry_thresh, exit_thresh)
+    n_closed = len(exit_idx)
+
+    # cum[k] = funding over periods [0, k), so any span sum is one subtraction
+    cum = np.concatenate(([0.0], np.cumsum(flows)))
+
+    # Per-trade funding over [entry, exit] inclusive; a position still open at the end is ignored
+    entries = entry_idx[:n_closed]
+    trade_funding = cum[exit_idx + 1] - cum[entries]
+    periods = exit_idx - entries
+    trade_costs = fixed_cost + borrow_per_period * periods
+    trade_pnl = trade_funding - trade_costs
+    
+    total_funding = float(trade_funding.sum())
+    total_costs = float(trade_costs.sum())
+    total_pnl = total_funding - total_costs
+
+    timestamps = times.astype("datetime64[ms]")
+    trades = [
+        {
+            "entry_time": timestamps[e].item(),
+            "exit_time": timestamps[x].item(),
+            "periods": int(x - e),
+            "avg_funding": float(rates[e]),
+            "funding_collected": float(f),
+            "costs": float(c),
+            "pnl": float(p),
+            "pnl_pct": float(p) / pos_size * 100,
+        }
+        for e, x, f, c, p in zip(entries[-10:], exit_idx[-10:], trade_funding[-10:],
+                                 trade_costs[-10:], trade_pnl[-10:])
+    ]
+
     # Calculate metrics
-    days = (df["timestamp"].iloc[-1] - df["timestamp"].iloc[0]).days or 1
+    days = int(times[-1] - times[0]) // (24 * 60 * 60 * 1000) or 1
     
     return {
-        "symbol": funding_data[0].get("symbol", "unknown"),
+        "symbol": symbol,
         "period_days": days,
-        "data_points": len(df),
-        "total_trades": len(trades),
+        "data_points": len(rates),
+        "total_trades": n_closed,
         "total_funding": total_funding,
         "total_costs": total_costs,
         "total_pnl": total_pnl,
-        "pnl_per_trade": total_pnl / len(trades) if trades else 0,
-        "win_rate": sum(1 for t in trades if t["pnl"] > 0) / len(trades) * 100 if trades else 0,
-        "avg_hold_periods": sum(t["periods"] for t in trades) / len(trades) if trades else 0,
-        "annualized_return": (total_pnl / config.position_size) * (365 / days) * 100 if days else 0,
-        "trades": trades[-10:],  # Last 10 trades
+        "pnl_per_trade": total_pnl / n_closed if n_closed else 0,
+        "win_rate": float((trade_pnl > 0).mean()) * 100 if n_closed else 0,
+        "avg_hold_periods": float(periods.mean()) if n_closed else 0,
+        "annualized_return": (total_pnl / pos_size) * (365 / days) * 100 if days else 0,
+        "trades": trades,  # Last 10 trades
     }
 
-async def main(symbols: list[str], days: int = 30):
-    print(f"\n{'='*70}")
-    print(f"FUNDING RATE BACKTEST - Last {days} days")
-    print(f"{'='*70}")
+async def load_funding_history(session: aiohttp.ClientSession, symbol: str,
+                               days: int) -> tuple[np.ndarray, bool]:
+    """
+    Return (history, from_cache) for a symbol, fetching and caching on a miss.
+    
+    Cache hits are memory-mapped read-only rather than copied into memory.
+    """
+    cache_file = DATA_DIR / f"{symbol}_{days}d.npy"
+    if cache_file.exists():
+        return np.load(cache_file, mmap_mode="r"), True
     
+    data = await fetch_binance_funding_history(session, symbol, days)
+    np.save(cache_file, data)
+    return data, False
+
+async def process_symbol(session: aiohttp.ClientSession, symbol: str, days: int,
+                         config: BacktestConfig) -> tuple[np.ndarray, bool, dict | None]:
+    """Load (or fetch and cache) one symbol's history and backtest it"""
+    data, from_cache = await load_funding_history(session, symbol, days)
+    return data, from_cache, run_backtest(data, config, symbol) if len(data) else None
+
+def format_symbol_report(symbol: str, data: np.ndarray, from_cache: bool, results: dict | None) -> list[str]:
+    """Report lines for one symbol's backtest"""
+    out = [f"\n{'='*50}", f"Fetching {symbol}..."]
+    if from_cache:
+        out.append(f"  Loaded from cache ({len(data)} records)")
+    else:
+        out.append(f"  Fetched {len(data)} records")
+    
+    if not len(data):
+        out.append(f"  No data for {symbol}")
+        return out
+    
+    out.append(f"\n📊 {symbol} Results:")
+    out.append(f"  Period: {results['period_days']} days")
+    out.append(f"  Total trades: {results['total_trades']}")
+    out.append(f"  Win rate: {results['win_rate']:.1f}%")
+    out.append(f"  Avg hold: {results['avg_hold_periods']:.1f} periods ({results['avg_hold_periods']*8:.0f}h)")
+    out.append(f"  Total P&L: ${results['total_pnl']:.2f}")
+    out.append(f"  Annualized: {results['annualized_return']:.1f}%")
+    
+    if results['trades']:
+        out.append(f"\n  Recent trades:")
+        for t in results['trades'][-3:]:
+            out.append(f"    {t['entry_time'].strftime('%m/%d')} → {t['exit_time'].strftime('%m/%d')}: "
+                       f"${t['pnl']:.2f} ({t['pnl_pct']:.2f}%)")
+    return out
+
+async def main(symbols: list[str], days: int = 30):
     config = BacktestConfig()
-    print(f"\nConfig:")
-    print(f"  Entry: funding < {config.entry_threshold*100:.2f}%")
-    print(f"  Exit: funding > {config.exit_threshold*100:.2f}%")
-    print(f"  Position size: ${config.position_size}")
-    
-    for symbol in symbols:
-        print(f"\n{'='*50}")
-        print(f"Fetching {symbol}...")
-        
-        # Check cache
-        cache_file = DATA_DIR / f"{symbol}_{days}d.json"
-        if cache_file.exists():
-            with open(cache_file) as f:
-                data = json.load(f)
-            print(f"  Loaded from cache ({len(data)} records)")
-        else:
-            data = await fetch_binance_funding_history(symbol, days)
-            with open(cache_file, "w") as f:
-                json.dump(data, f)
-            print(f"  Fetched {len(data)} records")
-        
-        if not data:
-            print(f"  No data for {symbol}")
+    out = [
+        f"\n{'='*70}",
+        f"FUNDING RATE BACKTEST - Last {days} days",
+        f"{'='*70}",
+        f"\nConfig:",
+        f"  Entry: funding < {config.entry_threshold*100:.2f}%",
+        f"  Exit: funding > {config.exit_threshold*100:.2f}%",
+        f"  Position size: ${config.position_size}",
+    ]
+    sys.stdout.write("\n".join(out) + "\n")
+    
+    # A failing symbol (bad name, error body) is reported on its own; the rest still run
+    async with new_session() as session:
+        processed = await asyncio.gather(
+            *(process_symbol(session, symbol, days, config) for symbol in symbols),
+            return_exceptions=True,
+        )
+    
+    # One write per symbol instead of a print() per line
+    for symbol, result in zip(symbols, processed):
+        if isinstance(result, Exception):
+            sys.stdout.write(f"\n{'='*50}\nFetching {symbol}...\n  Failed: {result!r}\n")
             continue
-        
-        results = run_backtest(data, config)
-        
-        print(f"\n📊 {symbol} Results:")
-        print(f"  Period: {results['period_days']} days")
-        print(f"  Total trades: {results['total_trades']}")
-        print(f"  Win rate: {results['win_rate']:.1f}%")
-        print(f"  Avg hold: {results['avg_hold_periods']:.1f} periods ({results['avg_hold_periods']*8:.0f}h)")
-        print(f"  Total P&L: ${results['total_pnl']:.2f}")
-        print(f"  Annualized: {results['annualized_return']:.1f}%")
-        
-        if results['trades']:
-            print(f"\n  Recent trades:")
-            for t in results['trades'][-3:]:
-                print(f"    {t['entry_time'].strftime('%m/%d')} → {t['exit_time'].strftime('%m/%d')}: "
-                      f"${t['pnl']:.2f} ({t['pnl_pct']:.2f}%)")
+        data, from_cache, results = result
+        sys.stdout.write("\n".join(format_symbol_report(symbol, data, from_cache, results)) + "\n")
 
 if __name__ == "__main__":
-    import sys
     symbols = sys.argv[1:] if len(sys.argv) > 1 else ["BTCUSDT", "ETHUSDT", "SOLUSDT"]
     asyncio.run(main(symbols, days=60))
@@ -0,0 +1,115 @@
+"""
+On-disk TTL cache for exchange responses.
+Lets back-to-back CLI runs reuse a scan from a few seconds ago.
+"""
+import functools
+import hashlib
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import orjson
+
+CACHE_DIR = Path(".cache/funding")
+DEFAULT_TTL = 30  # Seconds; funding moves slowly but tickers don't
+DEFAULT_STALE_TTL = 15 * 60  # Oldest payload served when a fetch fails (a few monitor scan intervals)
+
+class FileCache:
+    """
+    JSON payloads keyed by (exchange, endpoint), expired by age.
+    
+    An in-memory copy of each entry serves repeat reads within a process; the
+    file backs it across processes. The last good payload, if no older than
+    stale_ttl, is also kept as a fallback for when a fetch fails.
+    """
+
+    def __init__(self, path: Path = CACHE_DIR, ttl: float = DEFAULT_TTL, enabled: bool = True,
+                 stale_ttl: float = DEFAULT_STALE_TTL):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.enabled = enabled
+        self._memory: dict[tuple[str, str], tuple[float, object]] = {}  # key -> (stored at, payload)
+
+    def _file(self, exchange: str, url: str) -> Path:
+        return self.path / f"{exchange}_{hashlib.md5(url.encode()).hexdigest()}.json"
+
+    def _read_file(self, exchange: str, url: str, max_age: float | None):
+        cache_file = self._file(exchange, url)
+        try:
+            stored_at = cache_file.stat().st_mtime
+            if max_age is not None and time.time() - stored_at > max_age:
+                return None
+            payload = orjson.loads(cache_file.read_bytes())
+        except (OSError, orjson.JSONDecodeError):
+            return None
+        self._memory[(exchange, url)] = (stored_at, payload)
+        return payload
+
+    def get(self, exchange: str, url: str):
+        """Cached payload, or None if missing, expired or disabled"""
+        if not self.enabled:
+            return None
+        hit = self._memory.get((exchange, url))
+        if hit is not None and time.time() - hit[0] <= self.ttl:
+            return hit[1]
+        return self._read_file(exchange, url, self.ttl)
+
+    def get_stale(self, exchange: str, url: str):
+        """Last stored payload up to stale_ttl old, or None if there is none that recent"""
+        hit = self._memory.get((exchange, url))
+        if hit is not None and time.time() - hit[0] <= self.stale_ttl:
+            return hit[1]
+        return self._read_file(exchange, url, self.stale_ttl) if self.enabled else None
+
+    def set(self, exchange: str, url: str, payload):
+        """
+        Store payload; written to a temp file first so readers never see a partial one.
+        
+        Each writer gets its own temp file, so processes sharing the cache can't
+        collide. A failed file write is only logged; the memory copy still stands.
+        """
+        self._memory[(exchange, url)] = (time.time(), payload)
+        if not self.enabled:
+            return
+        cache_file = self._file(exchange, url)
+        tmp = None
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=self.path, prefix=cache_file.stem, suffix=".tmp",
+                                             delete=False) as f:
+                tmp = f.name
+                f.write(orjson.dumps(payload))
+            os.replace(tmp, cache_file)
+        except OSError as e:
+            print(f"[WARN] Could not write {exchange} cache ({e!r})", file=sys.stderr)
+            if tmp is not None:
+                Path(tmp).unlink(missing_ok=True)
+
+    def cached(self, exchange: str, url: str, mark_stale=None):
+        """
+        Decorator for an async fetcher returning a JSON-serializable result.
+        
+        Fresh hits skip the fetch; if the fetch fails, the last good result (up
+        to stale_ttl old) is returned instead, with a warning and passed through
+        mark_stale if given, rather than dropping the exchange.
+        """
+        def decorate(fetch):
+            @functools.wraps(fetch)
+            async def wrapper(*args, **kwargs):
+                if (hit := self.get(exchange, url)) is not None:
+                    return hit
+                try:
+                    result = await fetch(*args, **kwargs)
+                except Exception as e:
+                    stale = self.get_stale(exchange, url)
+                    if stale is None:
+                        raise
+                    print(f"[WARN] {exchange} fetch failed ({e!r}); using last cached rates", file=sys.stderr)
+                    return stale if mark_stale is None else mark_stale(stale)
+                self.set(exchange, url, result)
+                return result
+            return wrapper
+        return decorate
@@ -4,6 +4,7 @@ Copy to config_local.py and fill in credentials.
 """
 import os
 from dataclasses import dataclass, field
+from functools import cached_property, lru_cache
 from typing import Optional
 
 @dataclass
@@ -13,7 +14,7 @@ class ExchangeConfig:
     passphrase: str = ""  # OKX requires this
     testnet: bool = True  # Start with testnet!
 
-@dataclass  
+@dataclass(frozen=True, slots=True)
 class TradingConfig:
     # Minimum annualized yield after costs to consider
     min_net_yield_pct: float = 50.0  # 50% APR minimum
@@ -38,7 +39,7 @@ class TradingConfig:
     max_hold_hours: int = 72  # Max 3 days per position
     stop_loss_pct: float = 2.0  # 2% stop loss on the spread
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class CostModel:
     """Fee structure per exchange"""
     # Maker/taker fees (as decimal, e.g., 0.0002 = 0.02%)
@@ -69,14 +70,20 @@ class Config:
     costs: CostModel = field(default_factory=CostModel)
     
     # Whitelist of liquid symbols to consider
-    symbol_whitelist: list = field(default_factory=lambda: [
+    symbol_whitelist: tuple = field(default_factory=lambda: (
         "BTC", "ETH", "SOL", "DOGE", "XRP", "ADA", "AVAX", "LINK", 
         "DOT", "MATIC", "UNI", "ATOM", "LTC", "BCH", "APT", "ARB",
         "OP", "INJ", "SUI", "SEI", "TIA", "JUP", "PYTH", "JTO",
         "WIF", "BONK", "PEPE", "SHIB", "FIL", "NEAR", "RENDER"
-    ])
+    ))
+    
+    @cached_property
+    def symbol_whitelist_set(self) -> frozenset:
+        """Whitelist for O(1) membership checks"""
+        return frozenset(self.symbol_whitelist)
 
-# Load from environment or config file
+# Load from environment or config file (once per process; environment is read on first call)
+@lru_cache(maxsize=1)
 def load_config() -> Config:
     config = Config()
     
@@ -8,10 +8,14 @@ import hashlib
 import time
 import json
 from abc import ABC, abstractmethod
+from collections import deque
 from dataclasses import dataclass, field
 from typing import Optional
 from enum import Enum
-import aiohttp
+import numpy as np
+
+# Order latency samples kept per (exchange, metric)
+LATENCY_WINDOW = 1024
 
 class Side(Enum):
     LONG = "long"
@@ -21,7 +25,7 @@ class OrderType(Enum):
     MARKET = "market"
     LIMIT = "limit"
 
-@dataclass
+@dataclass(slots=True)
 class Order:
     exchange: str
     symbol: str
@@ -34,7 +38,7 @@ class Order:
     fill_price: Optional[float] = None
     filled_size: float = 0
     
-@dataclass
+@dataclass(slots=True)
 class Position:
     exchange: str
     symbol: str
@@ -45,7 +49,7 @@ class Position:
     pnl: float = 0
     funding_collected: float = 0
 
-@dataclass
+@dataclass(slots=True)
 class ArbPosition:
     """Combined delta-neutral position"""
     id: str
@@ -58,6 +62,172 @@ class ArbPosition:
     total_pnl: float = 0
     status: str = "open"
 
+class PositionStore:
+    """
+    Open arb positions stored column-wise, one slot per position.
+    
+    Dict-like by position id, so sweeps like funding accrual run over whole
+    arrays at once. Reads return a fresh ArbPosition built from the columns:
+    changes to it are not seen by the store until written back with
+    store[pos_id] = pos.
+    """
+    
+    _FLOAT_COLUMNS = ("long_size", "short_size", "long_entry_price", "short_entry_price",
+                      "long_entry_time", "short_entry_time", "long_pnl", "short_pnl",
+                      "long_funding", "short_funding",
+                      "entry_time", "target_funding_rate", "funding_collected", "pnl")
+    _STR_COLUMNS = ("ids", "long_exchange", "short_exchange", "long_symbol", "short_symbol",
+                    "base_asset", "status")
+    
+    def __init__(self, capacity: int = 16):
+        self._slot: dict[str, int] = {}
+        for name in self._STR_COLUMNS:
+            setattr(self, name, [])
+        for name in self._FLOAT_COLUMNS:
+            setattr(self, name, np.zeros(capacity))
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def __iter__(self):
+        return iter(list(self.ids))
+    
+    def __contains__(self, pos_id: str) -> bool:
+        return pos_id in self._slot
+    
+    def __setitem__(self, pos_id: str, pos: ArbPosition):
+        if pos_id in self._slot:
+            del self[pos_id]
+        i = len(self.ids)
+        if i == len(self.entry_time):
+            for name in self._FLOAT_COLUMNS:
+                setattr(self, name, np.resize(getattr(self, name), max(1, 2 * i)))
+        long_leg, short_leg = pos.long_leg, pos.short_leg
+        self._slot[pos_id] = i
+        self.ids.append(pos_id)
+        self.long_exchange.append(long_leg.exchange)
+        self.short_exchange.append(short_leg.exchange)
+        self.long_symbol.append(long_leg.symbol)
+        self.short_symbol.append(short_leg.symbol)
+        self.base_asset.append(pos.base_asset)
+        self.status.append(pos.status)
+        self.long_size[i] = long_leg.size
+        self.short_size[i] = short_leg.size
+        self.long_entry_price[i] = long_leg.entry_price
+        self.short_entry_price[i] = short_leg.entry_price
+        self.long_entry_time[i] = long_leg.entry_time
+        self.short_entry_time[i] = short_leg.entry_time
+        self.long_pnl[i] = long_leg.pnl
+        self.short_pnl[i] = short_leg.pnl
+        self.long_funding[i] = long_leg.funding_collected
+        self.short_funding[i] = short_leg.funding_collected
+        self.entry_time[i] = pos.entry_time
+        self.target_funding_rate[i] = pos.target_funding_rate
+        self.funding_collected[i] = pos.total_funding_collected
+        self.pnl[i] = pos.total_pnl
+    
+    def __getitem__(self, pos_id: str) -> ArbPosition:
+        i = self._slot[pos_id]
+        return ArbPosition(
+            id=pos_id,
+            long_leg=Position(
+                exchange=self.long_exchange[i],
+                symbol=self.long_symbol[i],
+                side=Side.LONG,
+                size=float(self.long_size[i]),
+                entry_price=float(self.long_entry_price[i]),
+                entry_time=float(self.long_entry_time[i]),
+                pnl=float(self.long_pnl[i]),
+                funding_collected=float(self.long_funding[i]),
+            ),
+            short_leg=Position(
+                exchange=self.short_exchange[i],
+                symbol=self.short_symbol[i],
+                side=Side.SHORT,
+                size=float(self.short_size[i]),
+                entry_price=float(self.short_entry_price[i]),
+                entry_time=float(self.short_entry_time[i]),
+                pnl=float(self.short_pnl[i]),
+                funding_collected=float(self.short_funding[i]),
+            ),
+            base_asset=self.base_asset[i],
+            entry_time=float(self.entry_time[i]),
+            target_funding_rate=float(self.target_funding_rate[i]),
+            total_funding_collected=float(self.funding_collected[i]),
+            total_pnl=float(self.pnl[i]),
+            status=self.status[i],
+        )
+    
+    def __delitem__(self, pos_id: str):
+        # Move the last slot into the freed one so columns stay dense
+        i = self._slot.pop(pos_id)
+        last = len(self.ids) - 1
+        if i != last:
+            moved = self.ids[last]
+            self._slot[moved] = i
+            for name in self._STR_COLUMNS:
+                column = getattr(self, name)
+                column[i] = column[last]
+            for name in self._FLOAT_COLUMNS:
+                values = getattr(self, name)
+                values[i] = values[last]
+        for name in self._STR_COLUMNS:
+            getattr(self, name).pop()
+    
+    def accrue_funding(self, rates: np.ndarray, periods: float = 1.0):
+        """
+        Credit funding to every open position in one pass.
+        
+        rates: per-position 8h funding rate, aligned with self.ids. The long
+        perp leg receives -rate * notional per period.
+        """
+        n = len(self.ids)
+        notional = self.long_size[:n] * self.long_entry_price[:n]
+        collected = -np.asarray(rates, dtype=np.float64) * notional * periods
+        self.funding_collected[:n] += collected
+        self.pnl[:n] += collected
+        self.long_funding[:n] += collected
+        self.long_pnl[:n] += collected
+
+class LatencyTracker:
+    """Rolling latency samples (ns) per (exchange, metric)"""
+    
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self._samples: dict[tuple[str, str], deque] = {}
+    
+    def record(self, exchange: str, metric: str, elapsed_ns: int):
+        samples = self._samples.get((exchange, metric))
+        if samples is None:
+            samples = self._samples[(exchange, metric)] = deque(maxlen=self.window)
+        samples.append(elapsed_ns)
+    
+    def stats(self) -> dict[tuple[str, str], dict]:
+        """min/p50/p95/p99 in microseconds for every (exchange, metric) seen"""
+        out = {}
+        for key, samples in self._samples.items():
+            us = np.fromiter(samples, dtype=np.int64, count=len(samples)) / 1000
+            p50, p95, p99 = np.percentile(us, [50, 95, 99])
+            out[key] = {"count": len(us), "min": float(us.min()), "p50": float(p50),
+                        "p95": float(p95), "p99": float(p99)}
+        return out
+
+class HmacSigner:
+    """
+    HMAC-SHA256 request signer for live exchange clients.
+    
+    The keyed HMAC state is built once per secret and copied for each request,
+    so signing skips re-deriving the key pads every time.
+    """
+    
+    def __init__(self, secret: str):
+        self._template = hmac.new(secret.encode(), digestmod=hashlib.sha256)
+    
+    def sign(self, payload: str | bytes) -> str:
+        mac = self._template.copy()
+        mac.update(payload.encode() if isinstance(payload, str) else payload)
+        return mac.hexdigest()
+
 class ExchangeClient(ABC):
     """Abstract exchange client"""
     
@@ -133,9 +303,17 @@ class SimulatedClient(ExchangeClient):
 class ArbExecutor:
     """Orchestrates delta-neutral position entry/exit"""
     
-    def __init__(self, clients: dict[str, ExchangeClient]):
+    def __init__(self, clients: dict[str, ExchangeClient], latency: Optional[LatencyTracker] = None):
         self.clients = clients
-        self.active_positions: dict[str, ArbPosition] = {}
+        self.active_positions = PositionStore()
+        self.latency = latency or LatencyTracker()
+    
+    async def _place(self, client: ExchangeClient, order: Order) -> Order:
+        """Place an order, recording order-to-ack latency for its venue"""
+        t0 = time.perf_counter_ns()
+        result = await client.place_order(order)
+        self.latency.record(order.exchange, "order_to_ack", time.perf_counter_ns() - t0)
+        return result
         
     async def open_position(
         self,
@@ -175,12 +353,13 @@ class ArbExecutor:
         
         # Execute simultaneously
         long_result, short_result = await asyncio.gather(
-            long_client.place_order(long_order),
-            short_client.place_order(short_order),
+            self._place(long_client, long_order),
+            self._place(short_client, short_order),
         )
         
-        # Create arb position
-        pos_id = f"arb_{int(time.time())}"
+        # One timestamp for both legs and the position, taken once the fills are back
+        now = time.time()
+        pos_id = f"arb_{int(now)}"
         arb_pos = ArbPosition(
             id=pos_id,
             long_leg=Position(
@@ -189,7 +368,7 @@ class ArbExecutor:
                 side=Side.LONG,
                 size=long_result.filled_size,
                 entry_price=long_result.fill_price,
-                entry_time=time.time(),
+                entry_time=now,
             ),
             short_leg=Position(
                 exchange=short_exchange,
@@ -197,10 +376,10 @@ class ArbExecutor:
                 side=Side.SHORT,
                 size=short_result.filled_size,
                 entry_price=short_result.fill_price,
-                entry_time=time.time(),
+                entry_time=now,
             ),
             base_asset=base_asset,
-            entry_time=time.time(),
+            entry_time=now,
             target_funding_rate=funding_rate,
         )
         
@@ -234,8 +413,8 @@ class ArbExecutor:
         )
         
         long_result, short_result = await asyncio.gather(
-            long_client.place_order(close_long),
-            short_client.place_order(close_short),
+            self._place(long_client, close_long),
+            self._place(short_client, close_short),
         )
         
         pos.status = "closed"
@@ -277,6 +456,16 @@ async def test_executor():
     print("\nClosing position...")
     result = await executor.close_position(pos.id)
     print(f"✓ Closed position: {result}")
+    
+    print("\nOrder latency (µs):")
+    for (exchange, metric), st in executor.latency.stats().items():
+        print(f"  {exchange:<10} {metric}: n={st['count']} min={st['min']:.1f} "
+              f"p50={st['p50']:.1f} p95={st['p95']:.1f} p99={st['p99']:.1f}")
 
 if __name__ == "__main__":
+    try:
+        import uvloop  # Optional: faster event loop where available
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
     asyncio.run(test_executor())
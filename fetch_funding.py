@@ -1,63 +1,188 @@
 import asyncio
 import aiohttp
-import json
-from datetime import datetime
-
-async def fetch_binance_funding(session):
-    """Binance USDT-M futures funding rates"""
-    url = "https://fapi.binance.com/fapi/v1/premiumIndex"
-    async with session.get(url) as resp:
-        data = await resp.json()
-        return [{"exchange": "binance", "symbol": d["symbol"], "rate": float(d["lastFundingRate"]), "next": d["nextFundingTime"]} for d in data if "USDT" in d["symbol"]]
-
-async def fetch_bybit_funding(session):
-    """Bybit linear funding rates"""
-    url = "https://api.bybit.com/v5/market/tickers?category=linear"
-    async with session.get(url) as resp:
-        data = await resp.json()
-        result = []
-        for d in data.get("result", {}).get("list", []):
-            if d.get("fundingRate"):
-                result.append({"exchange": "bybit", "symbol": d["symbol"], "rate": float(d["fundingRate"]), "next": d.get("nextFundingTime")})
-        return result
-
-async def fetch_hyperliquid_funding(session):
-    """Hyperliquid funding rates"""
-    url = "https://api.hyperliquid.xyz/info"
-    payload = {"type": "metaAndAssetCtxs"}
-    async with session.post(url, json=payload) as resp:
-        data = await resp.json()
-        meta = data[0]["universe"]
-        ctxs = data[1]
-        result = []
-        for i, asset in enumerate(meta):
-            if i < len(ctxs):
-                rate = float(ctxs[i].get("funding", 0))
-                result.append({"exchange": "hyperliquid", "symbol": asset["name"], "rate": rate, "next": None})
-        return result
-
-async def fetch_okx_funding(session):
-    """OKX swap funding rates"""
-    url = "https://www.okx.com/api/v5/public/funding-rate?instType=SWAP"
-    async with session.get(url) as resp:
-        data = await resp.json()
-        return [{"exchange": "okx", "symbol": d["instId"], "rate": float(d["fundingRate"]), "next": d.get("nextFundingTime")} for d in data.get("data", [])]
+import heapq
+import orjson
+import random
+import sys
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import partial
+from operator import itemgetter
+from typing import Any
 
-async def main():
-    async with aiohttp.ClientSession() as session:
-        results = await asyncio.gather(
-            fetch_binance_funding(session),
-            fetch_bybit_funding(session),
-            fetch_hyperliquid_funding(session),
-            fetch_okx_funding(session),
-            return_exceptions=True
+# Concurrent exchange requests in flight; keeps fan-out bounded as venues are added
+CONCURRENCY_LIMIT = 8
+FETCH_SEMAPHORE = asyncio.Semaphore(CONCURRENCY_LIMIT)
+
+RETRY_TRIES = 3
+RETRY_BASE_DELAY = 0.25  # Seconds; doubles each attempt plus up to 100ms jitter
+
+# One pooled session per event loop, reused across scans so connections stay alive
+_session: aiohttp.ClientSession | None = None
+_session_loop: asyncio.AbstractEventLoop | None = None
+
+def get_session() -> aiohttp.ClientSession:
+    """Shared keep-alive session for the running loop (created on first use)"""
+    global _session, _session_loop
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=100, limit_per_host=8, keepalive_timeout=75,
+                                           ttl_dns_cache=300, enable_cleanup_closed=True),
+            timeout=aiohttp.ClientTimeout(total=10, connect=3),
         )
+        _session_loop = loop
+    return _session
+
+class ExchangeError(Exception):
+    """A venue answered 200 but with an error envelope instead of data"""
+
+async def with_retry(fetch, *args, tries: int = RETRY_TRIES, base_delay: float = RETRY_BASE_DELAY,
+                     timeout: float | None = None):
+    """
+    Await fetch(*args), retrying transient errors (network, HTTP status, error
+    envelopes) with jittered backoff.
+    
+    timeout, if set, bounds each attempt; a stuck attempt counts as a failure.
+    """
+    for attempt in range(tries):
+        try:
+            async with asyncio.timeout(timeout):
+                return await fetch(*args)
+        except (aiohttp.ClientError, TimeoutError, ExchangeError):
+            if attempt == tries - 1:
+                raise
+            await asyncio.sleep(base_delay * 2 ** attempt + random.random() * 0.1)
+
+async def close_session():
+    """Close the shared session; call once at shutdown"""
+    global _session, _session_loop
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = _session_loop = None
+
+@dataclass(frozen=True, slots=True)
+class ExchangeSpec:
+    """How to fetch one venue's funding rates and map its rows to our records"""
+    url: str
+    rows: Callable[[Any], Iterable]  # Decoded body -> raw rows
+    symbol: Callable[[Any], str]
+    rate: Callable[[Any], float]
+    next: Callable[[Any], Any] = lambda row: None  # Next funding time, if the venue reports it
+    keep: Callable[[Any], bool] | None = None  # Row filter
+    payload: dict | None = None                # POST body; GET when None
+    error: Callable[[Any], str | None] = lambda data: None  # Error message if the body is an error envelope
+
+# Adding a venue is one entry here
+EXCHANGES = {
+    # Binance USDT-M futures
+    "binance": ExchangeSpec(
+        url="https://fapi.binance.com/fapi/v1/premiumIndex",
+        rows=lambda data: data,
+        keep=lambda d: "USDT" in d["symbol"],
+        symbol=itemgetter("symbol"),
+        rate=lambda d: float(d["lastFundingRate"]),
+        next=itemgetter("nextFundingTime"),
+        error=lambda data: None if isinstance(data, list) else f"{data.get('code')}: {data.get('msg')}",
+    ),
+    # Bybit linear
+    "bybit": ExchangeSpec(
+        url="https://api.bybit.com/v5/market/tickers?category=linear",
+        rows=lambda data: data.get("result", {}).get("list", []),
+        keep=lambda d: bool(d.get("fundingRate")),
+        symbol=itemgetter("symbol"),
+        rate=lambda d: float(d["fundingRate"]),
+        next=lambda d: d.get("nextFundingTime"),
+        error=lambda data: None if data.get("retCode") == 0 else f"retCode {data.get('retCode')}: {data.get('retMsg')}",
+    ),
+    # Hyperliquid: asset metadata and contexts come as parallel lists
+    "hyperliquid": ExchangeSpec(
+        url="https://api.hyperliquid.xyz/info",
+        payload={"type": "metaAndAssetCtxs"},
+        rows=lambda data: zip(data[0]["universe"], data[1]),
+        symbol=lambda row: row[0]["name"],
+        rate=lambda row: float(row[1].get("funding", 0)),
+        error=lambda data: None if isinstance(data, list) else str(data),
+    ),
+    # OKX swaps
+    "okx": ExchangeSpec(
+        url="https://www.okx.com/api/v5/public/funding-rate?instType=SWAP",
+        rows=lambda data: data.get("data", []),
+        symbol=itemgetter("instId"),
+        rate=lambda d: float(d["fundingRate"]),
+        next=lambda d: d.get("nextFundingTime"),
+        error=lambda data: None if data.get("code") == "0" else f"code {data.get('code')}: {data.get('msg')}",
+    ),
+}
+
+def check_response(name: str, data):
+    """Raise ExchangeError if a decoded body from `name` is an error envelope"""
+    message = EXCHANGES[name].error(data)
+    if message is not None:
+        raise ExchangeError(f"{name} {message}")
+
+async def fetch_exchange(session=None, *, name: str) -> list[dict]:
+    """Fetch one venue's funding rates as {"exchange", "symbol", "rate", "next"} records"""
+    spec = EXCHANGES[name]
+    session = session or get_session()
+    if spec.payload is None:
+        request = session.get(spec.url)
+    else:
+        request = session.post(spec.url, json=spec.payload)
+    async with FETCH_SEMAPHORE, request as resp:
+        resp.raise_for_status()
+        data = orjson.loads(await resp.read())
+    check_response(name, data)
+    
+    symbol, rate, next_, keep = spec.symbol, spec.rate, spec.next, spec.keep
+    return [
+        {"exchange": name, "symbol": symbol(row), "rate": rate(row), "next": next_(row)}
+        for row in spec.rows(data) if keep is None or keep(row)
+    ]
+
+FETCHERS = {name: partial(fetch_exchange, name=name) for name in EXCHANGES}
+
+# Deadline for the whole fan-out; a slow exchange is dropped rather than stalling the scan
+SCAN_DEADLINE = 8
+
+async def _fetch_or_error(fetch, session):
+    """Fetcher result, or the exception it raised, so one failure doesn't cancel its siblings"""
+    try:
+        return await with_retry(fetch, session)
+    except Exception as e:
+        return e
+
+async def fetch_all_funding(session=None) -> dict[str, list[dict] | Exception]:
+    """Fetch every exchange under one shared deadline; results keyed by exchange"""
+    session = session or get_session()
+    tasks = {}
+    try:
+        async with asyncio.timeout(SCAN_DEADLINE):
+            async with asyncio.TaskGroup() as tg:
+                tasks = {name: tg.create_task(_fetch_or_error(fetch, session)) for name, fetch in FETCHERS.items()}
+    except TimeoutError:
+        pass  # Keep whatever finished in time
+    
+    return {
+        name: task.result() if not task.cancelled() else TimeoutError(f"no response within {SCAN_DEADLINE}s")
+        for name, task in tasks.items()
+    }
+
+def format_rate_row(r: dict) -> str:
+    """Report line: exchange, symbol, 8h rate and annualized rate"""
+    return f"{r['exchange']:<12} {r['symbol']:<20} {r['rate']*100:>10.4f}% {r['annualized']:>10.2f}%"
+
+async def main():
+    session = get_session()
+    try:
+        results = await fetch_all_funding(session)
         
         all_rates = []
-        exchanges = ["binance", "bybit", "hyperliquid", "okx"]
-        for i, r in enumerate(results):
+        out = []
+        for exchange, r in results.items():
             if isinstance(r, Exception):
-                print(f"Error fetching {exchanges[i]}: {r}")
+                out.append(f"Error fetching {exchange}: {r}")
             else:
                 all_rates.extend(r)
         
@@ -65,39 +190,46 @@ async def main():
         for r in all_rates:
             r["annualized"] = r["rate"] * 3 * 365 * 100  # 3 funding periods per day
         
-        # Sort by most negative
-        negative = [r for r in all_rates if r["rate"] < 0]
-        negative.sort(key=lambda x: x["rate"])
+        # Most negative first; only the displayed top N are ever ordered
+        n_negative = sum(1 for r in all_rates if r["rate"] < 0)
+        negative = heapq.nsmallest(20, (r for r in all_rates if r["rate"] < 0), key=itemgetter("rate"))
         
-        print(f"\n{'='*60}")
-        print(f"FUNDING RATE SCAN - {datetime.utcnow().isoformat()}Z")
-        print(f"{'='*60}")
-        print(f"\nTotal pairs scanned: {len(all_rates)}")
-        print(f"Pairs with negative funding: {len(negative)}")
+        out.append(f"\n{'='*60}")
+        out.append(f"FUNDING RATE SCAN - {datetime.now(timezone.utc).isoformat()}")
+        out.append(f"{'='*60}")
+        out.append(f"\nTotal pairs scanned: {len(all_rates)}")
+        out.append(f"Pairs with negative funding: {n_negative}")
         
-        print(f"\n{'='*60}")
-        print("TOP 20 MOST NEGATIVE FUNDING (SHORTS PAY LONGS)")
-        print(f"{'='*60}")
-        print(f"{'Exchange':<12} {'Symbol':<20} {'Rate':<12} {'Annualized':<12}")
-        print("-" * 60)
-        for r in negative[:20]:
-            print(f"{r['exchange']:<12} {r['symbol']:<20} {r['rate']*100:>10.4f}% {r['annualized']:>10.2f}%")
+        out.append(f"\n{'='*60}")
+        out.append("TOP 20 MOST NEGATIVE FUNDING (SHORTS PAY LONGS)")
+        out.append(f"{'='*60}")
+        out.append(f"{'Exchange':<12} {'Symbol':<20} {'Rate':<12} {'Annualized':<12}")
+        out.append("-" * 60)
+        out.extend(format_rate_row(r) for r in negative)
         
         # Also show positive for comparison
-        positive = [r for r in all_rates if r["rate"] > 0]
-        positive.sort(key=lambda x: x["rate"], reverse=True)
+        positive = heapq.nlargest(10, (r for r in all_rates if r["rate"] > 0), key=itemgetter("rate"))
         
-        print(f"\n{'='*60}")
-        print("TOP 10 MOST POSITIVE FUNDING (LONGS PAY SHORTS)")
-        print(f"{'='*60}")
-        for r in positive[:10]:
-            print(f"{r['exchange']:<12} {r['symbol']:<20} {r['rate']*100:>10.4f}% {r['annualized']:>10.2f}%")
+        out.append(f"\n{'='*60}")
+        out.append("TOP 10 MOST POSITIVE FUNDING (LONGS PAY SHORTS)")
+        out.append(f"{'='*60}")
+        out.extend(format_rate_row(r) for r in positive)
         
         # Save raw data
-        with open("funding_rates.json", "w") as f:
-            json.dump(all_rates, f, indent=2)
+        with open("funding_rates.json", "wb") as f:
+            f.write(orjson.dumps(all_rates, option=orjson.OPT_INDENT_2))
+        
+        out.append(f"\n✓ Saved {len(all_rates)} rates to funding_rates.json")
         
-        print(f"\n✓ Saved {len(all_rates)} rates to funding_rates.json")
+        # One write for the whole report instead of a print() per line
+        sys.stdout.write("\n".join(out) + "\n")
+    finally:
+        await close_session()
 
 if __name__ == "__main__":
+    try:
+        import uvloop  # Optional: faster event loop where available
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
     asyncio.run(main())
@@ -11,12 +11,14 @@ Commands:
 """
 import asyncio
 import argparse
-import json
+import orjson
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 
 from config import load_config
-from monitor import run_scan, find_opportunities, fetch_all_funding, calculate_net_yield, WHITELIST, extract_base
+from monitor import run_scan, find_opportunities, fetch_all_funding, calculate_net_yield, WHITELIST, extract_base, FUNDING_CACHE
+from monitor import snapshot_files, open_snapshot, snapshot_date, stale_tag
 from models.opportunity_scorer import OpportunityScorer
 
 def cmd_scan(args):
@@ -27,6 +29,15 @@ def cmd_scan(args):
     
     asyncio.run(run_scan())
 
+def count_lines(path: Path) -> int:
+    """Count lines (as iterating the file would) without decoding them"""
+    count, last = 0, b"\n"
+    with open_snapshot(path) as f:
+        while chunk := f.read(1 << 20):
+            count += chunk.count(b"\n")
+            last = chunk[-1:]
+    return count + (last != b"\n")  # Unterminated final line
+
 def cmd_status(args):
     """Show system status"""
     config = load_config()
@@ -45,16 +56,26 @@ def cmd_status(args):
     
     # Historical data
     if data_dir.exists():
-        files = list(data_dir.glob("*.jsonl"))
-        total_lines = sum(1 for f in files for _ in open(f))
+        files = snapshot_files(data_dir)
+        with ThreadPoolExecutor() as pool:
+            total_lines = sum(pool.map(count_lines, files))
         print(f"\nHistorical data:")
-        print(f"  Days tracked: {len(files)}")
+        print(f"  Days tracked: {len({snapshot_date(f) for f in files})}")
         print(f"  Total snapshots: {total_lines}")
     
     # Active positions (placeholder)
     print(f"\nActive positions: 0")
     print(f"Total P&L: $0.00")
 
+def scan_history_file(path: Path) -> tuple[int, int]:
+    """(scans, opportunities) for one day's snapshot file, streamed in one pass"""
+    scans = opps = 0
+    with open_snapshot(path) as fp:
+        for line in fp:
+            opps += orjson.loads(line)["opp_count"]
+            scans += 1
+    return scans, opps
+
 def cmd_history(args):
     """Show historical funding data"""
     data_dir = Path("data/historical")
@@ -62,24 +83,25 @@ def cmd_history(args):
         print("No historical data found. Run 'scan' first.")
         return
     
-    # Load recent data
-    files = sorted(data_dir.glob("*.jsonl"), reverse=True)[:7]
+    # Load recent data; a day can have both an archive and a plain file
+    files = snapshot_files(data_dir)
+    recent = sorted({snapshot_date(f) for f in files}, reverse=True)[:7]
     
     print(f"\n{'='*60}")
     print("RECENT FUNDING HISTORY")
     print(f"{'='*60}")
     
-    opp_counts = []
+    opp_counts = {date: [0, 0] for date in recent}
     for f in files:
-        with open(f) as fp:
-            records = [json.loads(line) for line in fp]
-        
-        opps = sum(r["opp_count"] for r in records)
-        opp_counts.append((f.stem, len(records), opps))
+        counts = opp_counts.get(snapshot_date(f))
+        if counts is not None:
+            scans, opps = scan_history_file(f)
+            counts[0] += scans
+            counts[1] += opps
     
     print(f"\n{'Date':<12} {'Scans':<8} {'Opportunities':<15}")
     print("-" * 40)
-    for date, scans, opps in opp_counts:
+    for date, (scans, opps) in opp_counts.items():
         print(f"{date:<12} {scans:<8} {opps:<15}")
 
 def cmd_analyze(args):
@@ -99,10 +121,11 @@ def cmd_analyze(args):
     for r in sorted(asset_rates, key=lambda x: x["rate"]):
         net = calculate_net_yield(r["rate"])
         status = "✅ ACTIONABLE" if net > 30 else "❌ costs > yield" if r["rate"] < 0 else "neutral"
-        print(f"{r['exchange']:<12} {r['symbol']:<18} {r['rate']*100:>8.4f}% (net {net:>6.1f}% APR) {status}")
+        print(f"{r['exchange']:<12} {r['symbol']:<18} {r['rate']*100:>8.4f}% (net {net:>6.1f}% APR) {status}{stale_tag(r)}")
 
 def main():
     parser = argparse.ArgumentParser(description="Funding Rate Arbitrage Bot")
+    parser.add_argument("--no-cache", action="store_true", help="Always fetch fresh rates from exchanges")
     subparsers = parser.add_subparsers(dest="command", help="Commands")
     
     # Scan
@@ -123,6 +146,7 @@ def main():
     analyze_parser.set_defaults(func=cmd_analyze)
     
     args = parser.parse_args()
+    FUNDING_CACHE.enabled = not args.no_cache
     
     if args.command:
         args.func(args)
@@ -130,4 +154,9 @@ def main():
         parser.print_help()
 
 if __name__ == "__main__":
+    try:
+        import uvloop  # Optional: faster event loop where available
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
     main()
@@ -2,15 +2,38 @@
 Opportunity scoring for funding rate arbitrage.
 Calculates net yield after all costs and ranks opportunities.
 """
-import json
+import orjson
 from dataclasses import dataclass
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, timezone
 import sys
+import numpy as np
 sys.path.append("..")
 from config import load_config, Config
 
-@dataclass
+# Entry/exit/slippage are amortized over an assumed minimum hold of 3 periods (24h)
+HOLD_PERIODS = 3
+
+# Quote/contract suffixes stripped to get the base asset
+SYMBOL_SUFFIXES = ("USDT", "USD", "PERP", "-USDT-SWAP", "-USD-SWAP")
+
+# Major assets get a higher liquidity score (placeholder for order book depth)
+MAJOR_ASSETS = frozenset({"BTC", "ETH", "SOL", "XRP", "DOGE"})
+
+def net_yield(funding_rate, entry_cost, exit_cost, slippage_cost, borrow_cost_8h):
+    """
+    Net yield per 8h period after costs; works on floats or NumPy arrays.
+    
+    Funding received (as long) = -funding_rate. For a single 8h period we only
+    get funding once, so entry/exit/slippage are amortized over HOLD_PERIODS.
+    """
+    return -funding_rate - borrow_cost_8h - (entry_cost + exit_cost + slippage_cost) / HOLD_PERIODS
+
+def scan_timestamp() -> str:
+    """UTC scan time as an ISO string"""
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+@dataclass(slots=True)
 class Opportunity:
     exchange: str
     symbol: str
@@ -33,7 +56,8 @@ class Opportunity:
     timestamp: str
     
     def to_dict(self):
-        return self.__dict__
+        # Slotted instances have no __dict__
+        return {name: getattr(self, name) for name in self.__slots__}
 
 class OpportunityScorer:
     def __init__(self, config: Config):
@@ -41,34 +65,44 @@ class OpportunityScorer:
         self.costs = config.costs
         self.trading = config.trading
         
+        # Lookup tables built once instead of per rate
+        costs = config.costs
+        self._fee_map = {
+            "binance": (costs.binance_maker, costs.binance_taker),
+            "bybit": (costs.bybit_maker, costs.bybit_taker),
+            "hyperliquid": (costs.hyperliquid_maker, costs.hyperliquid_taker),
+            "okx": (costs.okx_maker, costs.okx_taker),
+        }
+        self._whitelist = config.symbol_whitelist_set
+        self._suffixes = tuple(sorted(SYMBOL_SUFFIXES, key=len, reverse=True))
+        self._base_assets: dict[str, str] = {}  # symbol -> base; the symbol universe repeats every scan
+        
     def get_fees(self, exchange: str) -> tuple[float, float]:
         """Get maker/taker fees for exchange"""
-        fee_map = {
-            "binance": (self.costs.binance_maker, self.costs.binance_taker),
-            "bybit": (self.costs.bybit_maker, self.costs.bybit_taker),
-            "hyperliquid": (self.costs.hyperliquid_maker, self.costs.hyperliquid_taker),
-            "okx": (self.costs.okx_maker, self.costs.okx_taker),
-        }
-        return fee_map.get(exchange, (0.0005, 0.0005))
+        return self._fee_map.get(exchange, (0.0005, 0.0005))
     
     def extract_base_asset(self, symbol: str) -> str:
         """Extract base asset from symbol (BTCUSDT -> BTC)"""
-        suffixes = ["USDT", "USD", "PERP", "-USDT-SWAP", "-USD-SWAP"]
-        for suffix in suffixes:
-            if symbol.endswith(suffix):
-                return symbol[:-len(suffix)]
-        return symbol
+        base = self._base_assets.get(symbol)
+        if base is None:
+            base = symbol
+            for suffix in self._suffixes:
+                if symbol.endswith(suffix):
+                    base = symbol[:-len(suffix)]
+                    break
+            self._base_assets[symbol] = base
+        return base
     
     def is_whitelisted(self, symbol: str) -> bool:
         """Check if symbol's base asset is in whitelist"""
-        base = self.extract_base_asset(symbol)
-        return base in self.config.symbol_whitelist
+        return self.extract_base_asset(symbol) in self._whitelist
     
-    def calculate_opportunity(self, rate_data: dict) -> Optional[Opportunity]:
+    def calculate_opportunity(self, rate_data: dict, timestamp: Optional[str] = None) -> Optional[Opportunity]:
         """
         Calculate net yield opportunity from funding rate data.
         
         rate_data: {"exchange": str, "symbol": str, "rate": float, ...}
+        timestamp: ISO scan time to stamp on the result (defaults to now)
         """
         exchange = rate_data["exchange"]
         symbol = rate_data["symbol"]
@@ -99,23 +133,11 @@ class OpportunityScorer:
         # Borrow cost for spot short (per 8h)
         borrow_cost_8h = self.costs.default_borrow_apr / (3 * 365)  # 3 periods per day
         
-        # Net yield per 8h period
-        # Funding received (as long) = -funding_rate (since funding is negative)
-        funding_received = -funding_rate
-        
-        # For a single 8h period, we only get funding once
-        # Costs are amortized over expected hold time
-        # Assume minimum 3 periods (24h) hold
-        periods = 3
-        amortized_entry_exit = (entry_cost + exit_cost + slippage_cost) / periods
-        
-        net_yield_8h = funding_received - borrow_cost_8h - amortized_entry_exit
+        net_yield_8h = net_yield(funding_rate, entry_cost, exit_cost, slippage_cost, borrow_cost_8h)
         net_yield_annualized = net_yield_8h * 3 * 365 * 100  # As percentage
         
         # Simple liquidity score (placeholder - would use order book depth)
-        # Major assets get higher scores
-        major_assets = {"BTC", "ETH", "SOL", "XRP", "DOGE"}
-        liquidity_score = 0.9 if base_asset in major_assets else 0.5
+        liquidity_score = 0.9 if base_asset in MAJOR_ASSETS else 0.5
         
         return Opportunity(
             exchange=exchange,
@@ -130,33 +152,74 @@ class OpportunityScorer:
             net_yield_8h=net_yield_8h,
             net_yield_annualized=net_yield_annualized,
             liquidity_score=liquidity_score,
-            timestamp=datetime.utcnow().isoformat()
+            timestamp=timestamp or scan_timestamp()
         )
     
     def score_all(self, rates: list[dict]) -> list[Opportunity]:
-        """Score all funding rates and return sorted opportunities"""
-        opportunities = []
-        for rate in rates:
-            opp = self.calculate_opportunity(rate)
-            if opp and opp.net_yield_annualized >= self.trading.min_net_yield_pct:
-                opportunities.append(opp)
+        """
+        Score all funding rates and return sorted opportunities.
+        
+        Same result as calculate_opportunity() per rate, but the yield math runs
+        as array operations and Opportunity objects are built only for survivors.
+        """
+        if not rates:
+            return []
+        
+        funding = np.fromiter((r["rate"] for r in rates), dtype=np.float64, count=len(rates))
+        
+        # Rate cut first (rejects most pairs), then the string work on what's left
+        candidates = np.flatnonzero((funding < 0) & (funding <= self.trading.min_funding_rate))
+        idx = np.array([i for i in candidates if self.is_whitelisted(rates[i]["symbol"])], dtype=np.intp)
+        if not len(idx):
+            return []
         
-        # Sort by net yield (descending)
-        opportunities.sort(key=lambda x: x.net_yield_annualized, reverse=True)
+        fees = np.array([self.get_fees(rates[i]["exchange"]) for i in idx], dtype=np.float64).reshape(-1, 2)
+        entry_cost = 2 * fees[:, 1]  # 2x taker
+        exit_cost = 2 * fees[:, 0]   # 2x maker
+        slippage_cost = self.costs.slippage_estimate * 2
+        borrow_cost_8h = self.costs.default_borrow_apr / (3 * 365)
+        
+        net_yield_8h = net_yield(funding[idx], entry_cost, exit_cost, slippage_cost, borrow_cost_8h)
+        net_yield_annualized = net_yield_8h * 3 * 365 * 100
+        
+        # Sort by net yield (descending, ties keep input order)
+        keep = np.flatnonzero(net_yield_annualized >= self.trading.min_net_yield_pct)
+        keep = keep[np.argsort(-net_yield_annualized[keep], kind="stable")]
+        
+        # Every opportunity from one scan shares the scan's timestamp
+        timestamp = scan_timestamp()
+        opportunities = []
+        for k in keep:
+            rate_data = rates[idx[k]]
+            base_asset = self.extract_base_asset(rate_data["symbol"])
+            opportunities.append(Opportunity(
+                exchange=rate_data["exchange"],
+                symbol=rate_data["symbol"],
+                base_asset=base_asset,
+                funding_rate=rate_data["rate"],
+                funding_annualized=rate_data["rate"] * 3 * 365 * 100,
+                entry_cost=float(entry_cost[k]),
+                exit_cost=float(exit_cost[k]),
+                slippage_cost=slippage_cost,
+                borrow_cost_8h=borrow_cost_8h,
+                net_yield_8h=float(net_yield_8h[k]),
+                net_yield_annualized=float(net_yield_annualized[k]),
+                liquidity_score=0.9 if base_asset in MAJOR_ASSETS else 0.5,
+                timestamp=timestamp
+            ))
         return opportunities
 
-
 def main():
     # Load funding rates
-    with open("../funding_rates.json") as f:
-        rates = json.load(f)
+    with open("../funding_rates.json", "rb") as f:
+        rates = orjson.loads(f.read())
     
     config = load_config()
     scorer = OpportunityScorer(config)
     opportunities = scorer.score_all(rates)
     
     print(f"\n{'='*80}")
-    print(f"FUNDING ARB OPPORTUNITIES - {datetime.utcnow().isoformat()}Z")
+    print(f"FUNDING ARB OPPORTUNITIES - {datetime.now(timezone.utc).isoformat()}")
     print(f"Minimum net yield: {config.trading.min_net_yield_pct}% APR")
     print(f"{'='*80}")
     
@@ -172,8 +235,8 @@ def main():
         print(f"{opp.exchange:<12} {opp.symbol:<15} {opp.funding_annualized:>10.1f}% {opp.net_yield_annualized:>10.1f}% {opp.liquidity_score:>5.2f}")
     
     # Save opportunities
-    with open("../opportunities.json", "w") as f:
-        json.dump([o.to_dict() for o in opportunities], f, indent=2)
+    with open("../opportunities.json", "wb") as f:
+        f.write(orjson.dumps([o.to_dict() for o in opportunities], option=orjson.OPT_INDENT_2))
     
     print(f"\n✓ Saved {len(opportunities)} opportunities to opportunities.json")
     
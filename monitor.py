@@ -5,11 +5,26 @@ Continuously scans for opportunities and saves historical data.
 """
 import asyncio
 import aiohttp
-import json
+import atexit
+import functools
+import gzip
+import heapq
+import io
+import orjson
 import os
+import re
+from collections.abc import Iterable
 from datetime import datetime, timezone
+from operator import itemgetter
 from pathlib import Path
+from urllib.parse import urlsplit
+import shutil
 import sys
+import time
+import numpy as np
+
+from cache import FileCache
+from fetch_funding import check_response, with_retry
 
 # Ensure data directory exists
 DATA_DIR = Path("data/historical")
@@ -18,67 +33,197 @@ DATA_DIR.mkdir(parents=True, exist_ok=True)
 # Alert thresholds
 ALERT_FUNDING_THRESHOLD = -0.0015  # -0.15% per 8h (annualized ~-164%)
 MIN_NET_YIELD_APR = 30  # Alert if net yield > 30%
+TOP_OPPORTUNITIES = 5  # Ranked opportunities shown in alerts and kept in snapshots
 
 # Cost assumptions for quick calc
 ROUND_TRIP_COST = 0.0024  # ~0.24% (entry + exit + slippage)
 BORROW_8H = 0.000274  # ~30% APR
+AMORTIZED_COST_8H = ROUND_TRIP_COST / 3  # Round trip spread over a 24h hold
+
+# Most negative rate that can still alert: below the alert threshold and at least
+# MIN_NET_YIELD_APR after costs. Anything above it is rejected with one compare.
+YIELD_RATE_CUTOFF = -(MIN_NET_YIELD_APR / (3 * 365 * 100) + BORROW_8H + AMORTIZED_COST_8H)
+RATE_CUTOFF = min(ALERT_FUNDING_THRESHOLD, YIELD_RATE_CUTOFF)
+
+# Exchange endpoints
+BINANCE_URL = "https://fapi.binance.com/fapi/v1/premiumIndex"
+BYBIT_URL = "https://api.bybit.com/v5/market/tickers?category=linear"
+HYPERLIQUID_URL = "https://api.hyperliquid.xyz/info"
+OKX_URL = "https://www.okx.com/api/v5/public/funding-rate?instType=SWAP"
+
+EXCHANGE_ORIGINS = tuple(
+    f"{urlsplit(url).scheme}://{urlsplit(url).netloc}/"
+    for url in (BINANCE_URL, BYBIT_URL, HYPERLIQUID_URL, OKX_URL)
+)
 
-WHITELIST = {
+# Per-exchange attempt deadline and retry backoff (100ms, 200ms, ... plus jitter)
+EXCHANGE_TIMEOUT = 8
+RETRY_BASE_DELAY = 0.1
+
+# Short-lived on-disk cache of each exchange's rates (disable with --no-cache)
+FUNDING_CACHE = FileCache()
+
+WHITELIST = frozenset({
     "BTC", "ETH", "SOL", "DOGE", "XRP", "ADA", "AVAX", "LINK", 
     "DOT", "MATIC", "UNI", "ATOM", "LTC", "BCH", "APT", "ARB",
     "OP", "INJ", "SUI", "SEI", "TIA", "JUP", "PYTH", "JTO",
     "WIF", "BONK", "PEPE", "SHIB", "FIL", "NEAR", "RENDER"
-}
+})
+
+SYMBOL_SUFFIXES = ("USDT", "USD", "PERP", "-USDT-SWAP", "-USD-SWAP")
+
+# Whitelisted base plus optional suffix in one match (same result as extract_base + WHITELIST check)
+WHITELIST_RE = re.compile(
+    "(" + "|".join(map(re.escape, sorted(WHITELIST, key=len, reverse=True))) + ")"
+    "(?:" + "|".join(map(re.escape, SYMBOL_SUFFIXES)) + ")?"
+)
 
 def extract_base(symbol: str) -> str:
-    for suffix in ["USDT", "USD", "PERP", "-USDT-SWAP", "-USD-SWAP"]:
+    if not symbol.endswith(SYMBOL_SUFFIXES):  # One C-level check for unsuffixed names (e.g. Hyperliquid)
+        return symbol
+    for suffix in SYMBOL_SUFFIXES:
         if symbol.endswith(suffix):
             return symbol[:-len(suffix)]
     return symbol
 
-async def fetch_all_funding() -> list[dict]:
-    """Fetch funding rates from all exchanges"""
-    async with aiohttp.ClientSession() as session:
+def new_session() -> aiohttp.ClientSession:
+    """Session meant to outlive a scan, so each exchange's connection stays warm"""
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=32, limit_per_host=8, ttl_dns_cache=300, keepalive_timeout=120),
+        timeout=aiohttp.ClientTimeout(total=10),
+    )
+
+# symbol -> whitelisted base asset, or None if not whitelisted; symbol sets barely change between scans
+_SYMBOL_CACHE: dict[str, str | None] = {}
+
+def whitelisted_base(symbol: str) -> str | None:
+    """Base asset of symbol if it's on the whitelist, else None (memoized)"""
+    try:
+        return _SYMBOL_CACHE[symbol]
+    except KeyError:
+        m = WHITELIST_RE.fullmatch(symbol)
+        base = _SYMBOL_CACHE[symbol] = m[1] if m else None
+        return base
+
+async def fetch_all_funding(session: aiohttp.ClientSession | None = None) -> list[dict]:
+    """Fetch funding rates from all exchanges (on a throwaway session if none is given)"""
+    if session is None:
+        async with new_session() as own_session:
+            return await fetch_all_funding(own_session)
+    
+    async with asyncio.TaskGroup() as tg:
         tasks = [
-            fetch_binance(session),
-            fetch_bybit(session),
-            fetch_hyperliquid(session),
-            fetch_okx(session),
+            tg.create_task(_fetch_or_none(fetch, session))
+            for fetch in (fetch_binance, fetch_bybit, fetch_hyperliquid, fetch_okx)
         ]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        all_rates = []
-        for r in results:
-            if isinstance(r, list):
-                all_rates.extend(r)
-        return all_rates
+    
+    all_rates = []
+    for task in tasks:
+        r = task.result()
+        if isinstance(r, list):
+            all_rates.extend(r)
+    return all_rates
 
+async def _fetch_or_none(fetch, session):
+    """Fetcher result, or None on failure so one exchange can't cancel the others"""
+    try:
+        return await fetch(session)
+    except Exception as e:
+        print(f"[WARN] {fetch.__name__.removeprefix('fetch_')} skipped this scan: {e!r}", file=sys.stderr)
+        return None
+
+async def prewarm(session: aiohttp.ClientSession):
+    """Open a connection to each exchange host ahead of the first scan"""
+    async def touch(url):
+        async with session.head(url, allow_redirects=False):
+            pass
+    await asyncio.gather(*(touch(url) for url in EXCHANGE_ORIGINS), return_exceptions=True)
+
+class TokenBucket:
+    """Request pacing: bursts up to `capacity`, refilled at `rate` tokens per second"""
+    
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+    
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+# Requests/second per exchange, kept under each venue's public rate limit for these endpoints
+EXCHANGE_BUCKETS = {
+    "binance": TokenBucket(4),       # 2400 weight/min, premiumIndex (all symbols) costs 10
+    "bybit": TokenBucket(10),
+    "hyperliquid": TokenBucket(1),   # 1200 weight/min, info requests cost 20
+    "okx": TokenBucket(5),           # 10 requests / 2s
+}
+
+def mark_stale(rows: list[dict]) -> list[dict]:
+    """Flag cached fallback rows so they stay in the scan but are labelled wherever shown"""
+    return [{**row, "stale": True} for row in rows]
+
+def stale_tag(row: dict) -> str:
+    """Suffix marking a rate (or opportunity built from one) that came from the stale fallback"""
+    return " (stale)" if "stale" in row else ""
+
+def retried(fetch):
+    """Retry a fetcher with backoff, each attempt bounded by EXCHANGE_TIMEOUT"""
+    @functools.wraps(fetch)
+    async def wrapper(session):
+        return await with_retry(fetch, session, base_delay=RETRY_BASE_DELAY, timeout=EXCHANGE_TIMEOUT)
+    return wrapper
+
+@FUNDING_CACHE.cached("binance", BINANCE_URL, mark_stale)
+@retried
 async def fetch_binance(session):
-    url = "https://fapi.binance.com/fapi/v1/premiumIndex"
-    async with session.get(url, timeout=10) as resp:
-        data = await resp.json()
+    await EXCHANGE_BUCKETS["binance"].acquire()
+    async with session.get(BINANCE_URL, timeout=10) as resp:
+        resp.raise_for_status()
+        data = orjson.loads(await resp.read())
+        check_response("binance", data)
         return [{"exchange": "binance", "symbol": d["symbol"], "rate": float(d["lastFundingRate"])} 
                 for d in data if "USDT" in d["symbol"]]
 
+@FUNDING_CACHE.cached("bybit", BYBIT_URL, mark_stale)
+@retried
 async def fetch_bybit(session):
-    url = "https://api.bybit.com/v5/market/tickers?category=linear"
-    async with session.get(url, timeout=10) as resp:
-        data = await resp.json()
+    await EXCHANGE_BUCKETS["bybit"].acquire()
+    async with session.get(BYBIT_URL, timeout=10) as resp:
+        resp.raise_for_status()
+        data = orjson.loads(await resp.read())
+        check_response("bybit", data)
         return [{"exchange": "bybit", "symbol": d["symbol"], "rate": float(d.get("fundingRate", 0))} 
                 for d in data.get("result", {}).get("list", []) if d.get("fundingRate")]
 
+@FUNDING_CACHE.cached("hyperliquid", HYPERLIQUID_URL, mark_stale)
+@retried
 async def fetch_hyperliquid(session):
-    url = "https://api.hyperliquid.xyz/info"
-    async with session.post(url, json={"type": "metaAndAssetCtxs"}, timeout=10) as resp:
-        data = await resp.json()
+    await EXCHANGE_BUCKETS["hyperliquid"].acquire()
+    async with session.post(HYPERLIQUID_URL, json={"type": "metaAndAssetCtxs"}, timeout=10) as resp:
+        resp.raise_for_status()
+        data = orjson.loads(await resp.read())
+        check_response("hyperliquid", data)
         meta, ctxs = data[0]["universe"], data[1]
         return [{"exchange": "hyperliquid", "symbol": meta[i]["name"], "rate": float(ctxs[i].get("funding", 0))}
                 for i in range(min(len(meta), len(ctxs)))]
 
+@FUNDING_CACHE.cached("okx", OKX_URL, mark_stale)
+@retried
 async def fetch_okx(session):
-    url = "https://www.okx.com/api/v5/public/funding-rate?instType=SWAP"
-    async with session.get(url, timeout=10) as resp:
-        data = await resp.json()
+    await EXCHANGE_BUCKETS["okx"].acquire()
+    async with session.get(OKX_URL, timeout=10) as resp:
+        resp.raise_for_status()
+        data = orjson.loads(await resp.read())
+        check_response("okx", data)
         return [{"exchange": "okx", "symbol": d["instId"], "rate": float(d["fundingRate"])} 
                 for d in data.get("data", [])]
 
@@ -87,68 +232,201 @@ def calculate_net_yield(funding_rate: float) -> float:
     if funding_rate >= 0:
         return 0
     funding_received = -funding_rate
-    amortized_cost = ROUND_TRIP_COST / 3
-    net_8h = funding_received - BORROW_8H - amortized_cost
+    net_8h = funding_received - BORROW_8H - AMORTIZED_COST_8H
     return net_8h * 3 * 365 * 100
 
 def find_opportunities(rates: list[dict]) -> list[dict]:
-    """Find actionable opportunities"""
-    opps = []
-    for r in rates:
-        base = extract_base(r["symbol"])
-        if base not in WHITELIST:
+    """Find actionable opportunities, in scan order (see top_opportunities for ranking)"""
+    if not rates:
+        return []
+    funding = np.fromiter(map(itemgetter("rate"), rates), dtype=np.float64, count=len(rates))
+    
+    # Cheap rate reject over the whole scan first; only survivors reach the symbol lookup
+    # (globals and bound methods hoisted into locals for the per-row loop)
+    idx, bases = [], []
+    add_idx, add_base, base_of = idx.append, bases.append, whitelisted_base
+    for i in np.flatnonzero(funding < RATE_CUTOFF).tolist():
+        row = rates[i]
+        base = base_of(row["symbol"])
+        if base is not None:
+            add_idx(i)
+            add_base(base)
+    if not idx:
+        return []
+    
+    # Same arithmetic as calculate_net_yield, once over the candidates
+    rate = funding[idx]
+    net_yield = (-rate - BORROW_8H - AMORTIZED_COST_8H) * 3 * 365 * 100
+    annualized = rate * 3 * 365 * 100
+    
+    keep = np.flatnonzero(net_yield >= MIN_NET_YIELD_APR)
+    return [
+        {
+            **rates[idx[k]],
+            "base": bases[k],
+            "annualized": float(annualized[k]),
+            "net_yield_apr": float(net_yield[k]),
+        }
+        for k in keep
+    ]
+
+def top_opportunities(opportunities: list[dict], k: int = TOP_OPPORTUNITIES) -> list[dict]:
+    """Best k by net yield, highest first (ties keep scan order); O(N log k), no full sort"""
+    return heapq.nlargest(k, opportunities, key=itemgetter("net_yield_apr"))
+
+# A past day's file is only compressed once nothing has written to it for this long
+# (a compression lock older than this is taken to be left by a crashed process)
+SNAPSHOT_QUIET_SECONDS = 15 * 60
+
+def compress_past_snapshots(today: str, just_closed: Iterable[str] = ()):
+    """
+    Gzip finished days' snapshot files; today's stays plain JSONL so it can be appended to.
+    
+    Each day is compressed under an O_EXCL lock file, so concurrent writers never
+    both compress it. The new member is built next to the archive and swapped in
+    with one rename, so the archive only ever holds complete gzip members; a day
+    that already has one (e.g. a late record reopened it) gets appended to.
+    
+    Files written to in the last SNAPSHOT_QUIET_SECONDS are left for a later
+    rotation since another process may still have them open, except the days in
+    just_closed, which this process has just finished writing.
+    """
+    now = time.time()
+    for path in DATA_DIR.glob("*.jsonl"):
+        date_str = snapshot_date(path)
+        if date_str >= today:
             continue
-        if r["rate"] >= ALERT_FUNDING_THRESHOLD:
+        lock = DATA_DIR / f"{date_str}.jsonl.lock"
+        try:
+            if date_str not in just_closed and path.stat().st_mtime > now - SNAPSHOT_QUIET_SECONDS:
+                continue
+            os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileNotFoundError:
+            continue  # Already compressed by another process
+        except FileExistsError:
+            try:
+                if now - lock.stat().st_mtime > SNAPSHOT_QUIET_SECONDS:
+                    lock.unlink(missing_ok=True)  # Abandoned; retried next rotation
+            except FileNotFoundError:
+                pass  # Released meanwhile
             continue
-        
-        net_yield = calculate_net_yield(r["rate"])
-        if net_yield >= MIN_NET_YIELD_APR:
-            opps.append({
-                **r,
-                "base": base,
-                "annualized": r["rate"] * 3 * 365 * 100,
-                "net_yield_apr": net_yield,
-            })
-    
-    return sorted(opps, key=lambda x: x["net_yield_apr"], reverse=True)
-
-def save_snapshot(rates: list[dict], opportunities: list[dict]):
-    """Save rates snapshot to historical data"""
-    now = datetime.now(timezone.utc)
-    date_str = now.strftime("%Y-%m-%d")
-    time_str = now.strftime("%H%M")
-    
-    # Save full snapshot
-    snapshot_file = DATA_DIR / f"{date_str}.jsonl"
-    with open(snapshot_file, "a") as f:
-        record = {
-            "ts": now.isoformat(),
-            "rates_count": len(rates),
-            "opp_count": len(opportunities),
-            "top_opps": opportunities[:5],
-        }
-        f.write(json.dumps(record) + "\n")
+        try:
+            gz_path = DATA_DIR / f"{date_str}.jsonl.gz"
+            tmp = gz_path.with_name(gz_path.name + ".tmp")
+            try:
+                shutil.copyfile(gz_path, tmp)  # Existing members, if any
+            except FileNotFoundError:
+                tmp.unlink(missing_ok=True)
+            try:
+                with open(path, "rb") as src, gzip.open(tmp, "ab") as dst:
+                    shutil.copyfileobj(src, dst)
+            except FileNotFoundError:
+                tmp.unlink(missing_ok=True)
+                continue
+            tmp.replace(gz_path)
+            path.unlink(missing_ok=True)
+        finally:
+            lock.unlink(missing_ok=True)
+
+def snapshot_files(data_dir: Path = DATA_DIR) -> list[Path]:
+    """Daily snapshot files (plain or gzipped), oldest first"""
+    return sorted([*data_dir.glob("*.jsonl"), *data_dir.glob("*.jsonl.gz")])
+
+def open_snapshot(path: Path):
+    """Open a snapshot file for binary reading, decompressing if gzipped"""
+    return gzip.open(path, "rb") if path.suffix == ".gz" else open(path, "rb")
+
+def snapshot_date(path: Path) -> str:
+    """YYYY-MM-DD a snapshot file covers"""
+    return path.name.split(".", 1)[0]
+
+# Today's snapshot file, kept open across scans; rotated when the date changes
+_SNAPSHOT_FH: dict[str, io.BufferedWriter] = {}
+
+def close_snapshots():
+    """Flush and close open snapshot files"""
+    for fh in _SNAPSHOT_FH.values():
+        fh.close()
+    _SNAPSHOT_FH.clear()
+
+atexit.register(close_snapshots)
+
+def write_snapshots(batch: list[tuple[str, bytes]]):
+    """Append (date, JSONL line) records to their day's file, then flush once"""
+    for date_str, line in batch:
+        fh = _SNAPSHOT_FH.get(date_str)
+        if fh is None:
+            closed = list(_SNAPSHOT_FH)
+            close_snapshots()  # Previous day's file, if any
+            # Held open across scans on purpose; close_snapshots() closes it
+            fh = _SNAPSHOT_FH[date_str] = open(DATA_DIR / f"{date_str}.jsonl", "ab", buffering=65536)  # noqa: SIM115
+            try:
+                compress_past_snapshots(date_str, closed)
+            except Exception as e:  # Archiving is best effort; never lose the records being written
+                print(f"[ERROR] Snapshot compression failed: {e!r}")
+        fh.write(line)
+    for fh in _SNAPSHOT_FH.values():
+        fh.flush()
+
+# Pending snapshot records and the task draining them (see monitor_loop); no queue or a
+# finished writer means save_snapshot writes inline
+_SNAPSHOT_QUEUE: asyncio.Queue | None = None
+_SNAPSHOT_WRITER: asyncio.Task | None = None
+SNAPSHOT_BATCH = 64  # Most records coalesced into one write
+
+async def snapshot_writer(queue: asyncio.Queue):
+    """Drain queued snapshot records to disk in a worker thread until a None arrives"""
+    while True:
+        batch = [await queue.get()]
+        while not queue.empty() and len(batch) < SNAPSHOT_BATCH:
+            batch.append(queue.get_nowait())
+        try:
+            await asyncio.to_thread(write_snapshots, [item for item in batch if item is not None])
+        except Exception as e:  # One bad batch must not stop the writer for the rest of the run
+            print(f"[ERROR] Snapshot write failed: {e!r}")
+        if None in batch:
+            return
+
+def save_snapshot(rates: list[dict], opportunities: list[dict], now: datetime | None = None):
+    """Save rates snapshot to historical data (stamped `now`, default the current time)"""
+    if now is None:
+        now = datetime.now(timezone.utc)
+    date_str = f"{now.year:04d}-{now.month:02d}-{now.day:02d}"
+    
+    record = {
+        "ts": now.isoformat(),
+        "rates_count": len(rates),
+        "stale_count": sum("stale" in r for r in rates),
+        "opp_count": len(opportunities),
+        "top_opps": top_opportunities(opportunities),
+    }
+    item = (date_str, orjson.dumps(record) + b"\n")
+    
+    # Off the scan's critical path when the monitor loop's writer is running
+    if _SNAPSHOT_QUEUE is not None and not _SNAPSHOT_WRITER.done():
+        _SNAPSHOT_QUEUE.put_nowait(item)
+    else:
+        write_snapshots([item])
     
-    return snapshot_file
+    return DATA_DIR / f"{date_str}.jsonl"
+
+ALERT_HEADER = "🚨 **FUNDING ARB OPPORTUNITIES DETECTED**\n"
+ALERT_LINE = "• **{base}** @ {exchange}: funding {annualized:.1f}% → net {net_yield_apr:.1f}% APR"
 
 def format_alert(opportunities: list[dict]) -> str:
     """Format alert message"""
-    lines = ["🚨 **FUNDING ARB OPPORTUNITIES DETECTED**\n"]
-    for opp in opportunities[:5]:
-        lines.append(
-            f"• **{opp['base']}** @ {opp['exchange']}: "
-            f"funding {opp['annualized']:.1f}% → net {opp['net_yield_apr']:.1f}% APR"
-        )
-    return "\n".join(lines)
-
-async def run_scan():
+    return "\n".join([ALERT_HEADER, *(ALERT_LINE.format_map(o) + stale_tag(o) for o in top_opportunities(opportunities))])
+
+async def run_scan(session: aiohttp.ClientSession | None = None):
     """Single scan iteration"""
     try:
-        rates = await fetch_all_funding()
+        rates = await fetch_all_funding(session)
         opportunities = find_opportunities(rates)
-        save_snapshot(rates, opportunities)
         
-        timestamp = datetime.now(timezone.utc).strftime("%H:%M:%S")
+        # One clock read per scan, shared by the snapshot and the log line
+        now = datetime.now(timezone.utc)
+        save_snapshot(rates, opportunities, now)
+        timestamp = f"{now.hour:02d}:{now.minute:02d}:{now.second:02d}"
         
         if opportunities:
             print(f"\n[{timestamp}] 🎯 FOUND {len(opportunities)} OPPORTUNITIES!")
@@ -157,11 +435,11 @@ async def run_scan():
             return opportunities
         else:
             # Find best even if below threshold
-            whitelisted = [r for r in rates if extract_base(r["symbol"]) in WHITELIST and r["rate"] < 0]
+            whitelisted = [r for r in rates if r["rate"] < 0 and whitelisted_base(r["symbol"]) is not None]
             if whitelisted:
                 best = min(whitelisted, key=lambda x: x["rate"])
                 net = calculate_net_yield(best["rate"])
-                print(f"[{timestamp}] No opps. Best: {best['symbol']} @ {best['rate']*100:.4f}% (net {net:.1f}% APR) - need < {ALERT_FUNDING_THRESHOLD*100:.2f}%")
+                print(f"[{timestamp}] No opps. Best: {best['symbol']} @ {best['rate']*100:.4f}% (net {net:.1f}% APR) - need < {ALERT_FUNDING_THRESHOLD*100:.2f}%{stale_tag(best)}")
             else:
                 print(f"[{timestamp}] No negative funding on whitelisted assets")
             return []
@@ -176,16 +454,37 @@ async def monitor_loop(interval_seconds: int = 300):
     print(f"Scan interval: {interval_seconds}s")
     print(f"Watching {len(WHITELIST)} assets\n")
     
-    while True:
-        await run_scan()
-        await asyncio.sleep(interval_seconds)
+    # Snapshots go through one background writer; whatever is queued is written out on exit
+    global _SNAPSHOT_QUEUE, _SNAPSHOT_WRITER
+    queue = _SNAPSHOT_QUEUE = asyncio.Queue()
+    writer = _SNAPSHOT_WRITER = asyncio.create_task(snapshot_writer(queue))
+    
+    # One session for the life of the loop; closed on exit
+    try:
+        async with new_session() as session:
+            await prewarm(session)
+            while True:
+                await run_scan(session)
+                await asyncio.sleep(interval_seconds)
+    finally:
+        _SNAPSHOT_QUEUE = None
+        queue.put_nowait(None)
+        await writer
 
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser()
     parser.add_argument("--once", action="store_true", help="Run single scan")
     parser.add_argument("--interval", type=int, default=300, help="Scan interval (seconds)")
+    parser.add_argument("--no-cache", action="store_true", help="Always fetch fresh rates")
     args = parser.parse_args()
+    FUNDING_CACHE.enabled = not args.no_cache
+    
+    try:
+        import uvloop  # Optional: faster event loop where available
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
     
     if args.once:
         asyncio.run(run_scan())
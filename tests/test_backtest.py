@@ -0,0 +1,113 @@
+"""
+The vectorized trade pairing in backtest / deep_analysis against the original
+per-period state machine.
+"""
+import random
+
+import numpy as np
+import pytest
+
+import deep_analysis
+from backtest import BacktestConfig, find_trade_indices, run_backtest, to_funding_array
+
+T0 = 1_700_000_000_000
+PERIOD_MS = 8 * 60 * 60 * 1000
+
+def make_funding(rates: list[float]) -> np.ndarray:
+    return to_funding_array([{"fundingTime": T0 + i * PERIOD_MS, "fundingRate": str(r)} for i, r in enumerate(rates)])
+
+def random_rates(seed: int) -> list[float]:
+    rnd = random.Random(seed)
+    return [rnd.gauss(-0.0008, 0.0012) for _ in range(rnd.randint(1, 400))]
+
+def reference_trades(rates: list[float], entry_threshold: float, exit_threshold: float):
+    """The original loop: enter while flat on rate < entry, exit on a later rate > exit"""
+    trades, open_entry = [], None
+    for i, rate in enumerate(rates):
+        if open_entry is None:
+            if rate < entry_threshold:
+                open_entry = i
+        elif rate > exit_threshold:
+            trades.append((open_entry, i))
+            open_entry = None
+    return trades, open_entry
+
+def reference_backtest(rates: list[float], config: BacktestConfig) -> dict:
+    """Per-trade figures as the original iterrows loop computed them"""
+    trades, _ = reference_trades(rates, config.entry_threshold, config.exit_threshold)
+    fixed_cost = (config.entry_cost + config.exit_cost + config.slippage) * config.position_size
+    pnls, periods = [], []
+    for entry, exit_ in trades:
+        funding = sum(-rates[j] * config.position_size for j in range(entry, exit_ + 1))
+        costs = fixed_cost + config.borrow_rate_8h * config.position_size * (exit_ - entry)
+        pnls.append(funding - costs)
+        periods.append(exit_ - entry)
+    return {"trades": trades, "pnls": pnls, "periods": periods}
+
+# (entry, exit) pairs, including ones where a period can be both an entry and an exit signal
+THRESHOLDS = [(-0.0015, -0.0005), (-0.0010, -0.0002), (-0.0005, 0.0), (-0.0005, -0.001), (0.0, -0.002)]
+
+@pytest.mark.parametrize("entry,exit_", THRESHOLDS)
+@pytest.mark.parametrize("seed", range(40))
+def test_find_trade_indices_matches_loop(seed, entry, exit_):
+    rates = random_rates(seed)
+    trades, open_entry = reference_trades(rates, entry, exit_)
+
+    entries, exits = find_trade_indices(np.array(rates), entry, exit_)
+
+    assert exits.tolist() == [x for _, x in trades]
+    assert entries.tolist() == [e for e, _ in trades] + ([open_entry] if open_entry is not None else [])
+
+@pytest.mark.parametrize("entry,exit_", THRESHOLDS)
+@pytest.mark.parametrize("seed", range(40))
+def test_run_backtest_matches_loop(seed, entry, exit_):
+    rates = random_rates(seed)
+    config = BacktestConfig(entry_threshold=entry, exit_threshold=exit_)
+    ref = reference_backtest(rates, config)
+
+    result = run_backtest(make_funding(rates), config)
+
+    n = len(ref["trades"])
+    assert result["total_trades"] == n
+    assert result["total_pnl"] == pytest.approx(sum(ref["pnls"]), abs=1e-9)
+    assert result["win_rate"] == pytest.approx(sum(p > 0 for p in ref["pnls"]) / n * 100 if n else 0)
+    assert result["avg_hold_periods"] == pytest.approx(sum(ref["periods"]) / n if n else 0)
+    assert [t["pnl"] for t in result["trades"]] == pytest.approx(ref["pnls"][-10:], abs=1e-9)
+    assert [t["periods"] for t in result["trades"]] == ref["periods"][-10:]
+
+def test_position_open_at_end_is_not_counted():
+    config = BacktestConfig()
+    # One round trip, then an entry that never exits
+    rates = [-0.002, -0.001, 0.0, 0.0, -0.003, -0.002, -0.002]
+
+    result = run_backtest(make_funding(rates), config)
+
+    assert result["total_trades"] == 1
+    assert result["trades"][0]["periods"] == 2
+    expected_funding = (0.002 + 0.001 - 0.0) * config.position_size
+    assert result["total_funding"] == pytest.approx(expected_funding)
+    assert result["total_pnl"] == pytest.approx(result["total_funding"] - result["total_costs"])
+
+def test_unsorted_input_is_sorted_first():
+    rates = random_rates(7)
+    funding = make_funding(rates)
+    shuffled = funding[np.random.default_rng(0).permutation(len(funding))]
+
+    assert run_backtest(shuffled, BacktestConfig()) == run_backtest(funding, BacktestConfig())
+
+@pytest.mark.parametrize("seed", range(40))
+def test_simulate_realistic_strategy_matches_loop(seed):
+    rates = random_rates(seed)
+
+    results = deep_analysis.simulate_realistic_strategy(make_funding(rates))
+
+    for name, entry, exit_ in deep_analysis.STRATEGIES:
+        trades, _ = reference_trades(rates, entry, exit_)
+        pnls = [
+            sum(-rates[j] * 1000 for j in range(e, x + 1)) - (1.0 + 0.4 + 0.5 + 0.274 * (x - e))
+            for e, x in trades
+        ]
+        assert results[name]["total_trades"] == len(trades)
+        assert results[name]["total_pnl"] == pytest.approx(sum(pnls), abs=1e-9)
+        assert results[name]["avg_hold_hours"] == pytest.approx(
+            sum((x - e) * 8 for e, x in trades) / len(trades) if trades else 0)